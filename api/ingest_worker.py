@@ -0,0 +1,204 @@
+# api/ingest_worker.py
+"""
+Background indexing for POST /ingest.
+
+Uploaded PDFs are staged outside data/raw and queued as jobs. One worker thread takes them in order and
+hands the CPU-heavy steps (PDF extraction, chunking, embedding) to a single
+low-priority child process, so they neither hold the API process's GIL nor
+compete with /ask for the embedding model. Only the final, cheap commit into
+the live store runs in the API process. A staged PDF moves into data/raw as part
+of the commit and is deleted if the job fails.
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.rag.faiss_store import add_to_store
+from api.rag.ingest import chunk_pdf, embed_rows, meta_from_row
+
+RAW_DIR = Path("data/raw")
+STAGING_DIR = Path("data/staging/ingest")
+
+# Job states, in order
+QUEUED = "queued"
+EXTRACTING = "extracting"
+EMBEDDING = "embedding"
+COMMITTING = "committing"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class IngestJob:
+    job_id: str
+    doc_id: str
+    filename: str
+    status: str = QUEUED
+    n_chunks: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _init_child() -> None:
+    try:
+        os.nice(10)  # yield CPU to the API process under contention
+    except (AttributeError, OSError):
+        pass
+
+
+def _extract_and_chunk(pdf_path: str, doc_id: str) -> List[Dict[str, Any]]:
+    return chunk_pdf(Path(pdf_path), doc_id=doc_id)
+
+
+def _embed(rows: List[Dict[str, Any]]) -> np.ndarray:
+    return embed_rows(rows)
+
+
+class IngestWorker:
+    def __init__(self, raw_dir: Path = RAW_DIR, staging_dir: Path = STAGING_DIR) -> None:
+        self.raw_dir = raw_dir
+        self.staging_dir = staging_dir
+        self._jobs: Dict[str, IngestJob] = {}
+        self._q: "queue.Queue[Optional[Tuple[str, Path]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # Jobs live in memory only, so anything staged by a previous run is orphaned.
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self._pool = ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn"), initializer=_init_child)
+        self._thread = threading.Thread(target=self._run, name="ingest-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is not None:
+            self._q.put(None)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def submit(self, doc_id: str, filename: str, fileobj: BinaryIO) -> IngestJob:
+        """
+        Stages the upload and queues it. Raises FileExistsError if doc_id is already queued.
+        """
+        job = IngestJob(job_id=uuid.uuid4().hex, doc_id=doc_id, filename=filename)
+        with self._lock:
+            if any(j.doc_id == doc_id and j.status not in (DONE, FAILED) for j in self._jobs.values()):
+                raise FileExistsError(f"{doc_id} is already queued.")
+            self._jobs[job.job_id] = job
+
+        staged = self._staged_path(job)
+        try:
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            with staged.open("wb") as f:
+                shutil.copyfileobj(fileobj, f, 1 << 20)
+        except BaseException as e:
+            self._fail(job, e)
+            raise
+
+        self._q.put((job.job_id, staged))
+        return job
+
+    def _staged_path(self, job: IngestJob) -> Path:
+        # Keep the original filename: it is the filing's metadata source.
+        return self.staging_dir / job.job_id / job.filename
+
+    def _discard_staged(self, job: IngestJob) -> None:
+        shutil.rmtree(self.staging_dir / job.job_id, ignore_errors=True)
+
+    def _fail(self, job: IngestJob, e: BaseException) -> None:
+        self._discard_staged(job)
+        self._set(job, status=FAILED, error=f"{type(e).__name__}: {e}", finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IngestJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at)
+
+    def _set(self, job: IngestJob, **changes: Any) -> None:
+        with self._lock:
+            for k, v in changes.items():
+                setattr(job, k, v)
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            job_id, pdf_path = item
+            job = self.get(job_id)
+            if job is None:
+                continue
+            try:
+                self._process(job, pdf_path)
+            except Exception as e:  # a bad PDF must not kill the worker
+                self._fail(job, e)
+
+    def _process(self, job: IngestJob, pdf_path: Path) -> None:
+        assert self._pool is not None
+        self._set(job, status=EXTRACTING, started_at=time.time())
+        rows = self._pool.submit(_extract_and_chunk, str(pdf_path), job.doc_id).result()
+        if not rows:
+            raise ValueError("No text could be extracted from the PDF")
+
+        self._set(job, status=EMBEDDING, n_chunks=len(rows))
+        embs = self._pool.submit(_embed, rows).result()
+
+        self._set(job, status=COMMITTING)
+
+        # Move the PDF into data/raw before committing, so a filing that is in the
+        # store always has its source for offline rebuilds. Undo the move if the
+        # commit fails; once committed, nothing below can fail the job.
+        raw_path = self.raw_dir / job.filename
+        if raw_path.exists():
+            raise FileExistsError(f"{raw_path} appeared while the job was running.")
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+        os.replace(pdf_path, raw_path)
+        try:
+            add_to_store(rows, [meta_from_row(r) for r in rows], embs)
+        except BaseException:
+            os.replace(raw_path, pdf_path)
+            raise
+
+        self._discard_staged(job)  # rmtree(ignore_errors=True): cannot raise
+        self._set(job, status=DONE, finished_at=time.time())
+
+
+_worker = IngestWorker()
+
+
+def start() -> None:
+    _worker.start()
+
+
+def stop() -> None:
+    _worker.stop()
+
+
+def get_worker() -> IngestWorker:
+    return _worker
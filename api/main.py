@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, File, HTTPException, UploadFile
 from pydantic import BaseModel
 
-from api.rag.faiss_store import list_sources, search
+from api import ingest_worker, request_log
+from api.rag.faiss_store import list_sources, query_cache, reload_store, search, search_grouped
 
 
 DOC_CACHE = {}
@@ -20,6 +22,7 @@ class AskRequest(BaseModel):
     doc_id: Optional[str] = None
     top_k: int = 5
     max_pages: Optional[int] = None 
+    section: Optional[str] = None  # e.g. "1A", "item_7a", "risk_factors"
 
 
 class Citation(BaseModel):
@@ -36,6 +39,40 @@ class AskResponse(BaseModel):
     citations: List[Citation]
     evidence: List[Dict[str, Any]]  # includes chunk text for transparency
 
+class CompareRequest(BaseModel):
+    question: str
+    doc_ids: Optional[List[str]] = None  # default: every filing in /sources
+    top_k: int = 3  # evidence chunks per filing
+    section: Optional[str] = None
+
+
+class CompareGroup(BaseModel):
+    doc_id: str
+    company: Optional[str] = None
+    filing_year: Optional[str] = None
+    filing_type: Optional[str] = None
+    citations: List[Citation]
+    evidence: List[Dict[str, Any]]
+
+
+class CompareResponse(BaseModel):
+    refused: bool
+    refusal_reason: Optional[str] = None
+    groups: List[CompareGroup]
+
+
+@app.on_event("startup")
+def _start_background_workers() -> None:
+    request_log.start()
+    ingest_worker.start()
+
+
+@app.on_event("shutdown")
+def _stop_background_workers() -> None:
+    ingest_worker.stop()
+    request_log.stop()
+
+
 @app.get("/")
 def root():
     return {"message": "Finance RAG API is running. See /docs"}
@@ -45,6 +82,27 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    return query_cache.stats()
+
+
+@app.get("/logs/stats")
+def request_log_stats() -> Dict[str, int]:
+    # Records written, dropped (queue full) and still queued by the request logger.
+    return request_log.stats()
+
+
+@app.post("/admin/reload")
+def admin_reload() -> Dict[str, Any]:
+    # Pick up artifacts rebuilt offline without restarting; clears the query cache.
+    try:
+        index, meta, _ = reload_store()
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"chunks": int(index.ntotal), "generation": query_cache.stats()["generation"]}
+
+
 @app.get("/sources")
 def sources() -> Dict[str, Any]:
     return {
@@ -52,40 +110,69 @@ def sources() -> Dict[str, Any]:
     }
 
 
-def clean_excerpt(s: str) -> str:
-    return " ".join(s.replace("\u00a0", " ").split())
+@app.post("/ingest", status_code=202)
+def ingest(file: UploadFile = File(...)) -> Dict[str, Any]:
+    # Stages the PDF and queues it; indexing happens off the request path.
+    filename = Path(file.filename or "").name
+    if not filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Upload a .pdf file (e.g. Company_2023_10K.pdf).")
+    if file.file.read(5) != b"%PDF-":
+        raise HTTPException(status_code=400, detail=f"{filename} is not a PDF.")
+    file.file.seek(0)
+
+    doc_id = Path(filename).stem
+    worker = ingest_worker.get_worker()
+    try:
+        indexed = {d["doc_id"] for d in list_sources()}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if doc_id in indexed:
+        raise HTTPException(status_code=409, detail=f"{doc_id} is already indexed.")
+    if (RAW_DIR / filename).exists():
+        raise HTTPException(status_code=409, detail=f"{RAW_DIR / filename} already exists. Run the offline build to index it.")
+
+    try:
+        job = worker.submit(doc_id=doc_id, filename=filename, fileobj=file.file)
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job.to_dict()
 
-def sentence_safe_snippet(text: str, max_len: int = 320) -> str:
-    t = clean_excerpt(text)
 
-    # If chunk begins mid-word, skip forward to first space
-    if t and t[0].islower():
-        first_space = t.find(" ")
-        if 0 < first_space < 50:
-            t = t[first_space + 1 :]
+@app.get("/ingest")
+def ingest_jobs() -> Dict[str, Any]:
+    return {"jobs": [j.to_dict() for j in ingest_worker.get_worker().jobs()]}
 
-    # Try to start at the first likely sentence start.
-    # Heuristic: find first ". " then start after it, if the beginning looks broken.
-    if len(t) > 0 and t[0].islower():
-        dot = t.find(". ")
-        if 0 <= dot < 200:
-            t = t[dot + 2 :]
 
-    # Trim to max length nicely
-    if len(t) > max_len:
-        t = t[:max_len].rsplit(" ", 1)[0] + "..."
-    return t
+@app.get("/ingest/{job_id}")
+def ingest_status(job_id: str) -> Dict[str, Any]:
+    job = ingest_worker.get_worker().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job.to_dict()
+
 
 @app.post("/ask", response_model=AskResponse)
 def ask(req: AskRequest) -> AskResponse:
-    def clean_excerpt(s: str) -> str:
-        # Collapse whitespace and remove weird PDF line breaks/non-breaking spaces
-        return " ".join(s.replace("\u00a0", " ").split())
+    t0 = time.perf_counter()
+    resp = _ask(req)
+    request_log.log_request(
+        endpoint="/ask",
+        question=req.question,
+        doc_id=req.doc_id,
+        top_k=req.top_k,
+        latency_ms=(time.perf_counter() - t0) * 1000,
+        hit_ids=[c.chunk_id for c in resp.citations],
+        refused=resp.refused,
+        section=req.section,
+    )
+    return resp
+
 
+def _ask(req: AskRequest) -> AskResponse:
     # doc_id is optional. If provided, results filter to that filing only.
     try:
-        hits = search(query=req.question, top_k=req.top_k, doc_id=req.doc_id)
-    except FileNotFoundError as e:
+        hits = search(query=req.question, top_k=req.top_k, doc_id=req.doc_id, section=req.section)
+    except (FileNotFoundError, ValueError) as e:
         return AskResponse(
             answer="",
             refused=True,
@@ -111,8 +198,7 @@ def ask(req: AskRequest) -> AskResponse:
     ]
 
     for h in hits[:3]:
-        snippet = sentence_safe_snippet(h.text, max_len=320)
-        answer_lines.append(f"- {snippet} ({h.chunk_id})")
+        answer_lines.append(f"- {h.snippet} ({h.chunk_id})")
 
     citations = [Citation(chunk_id=h.chunk_id, doc_id=h.doc_id, score=float(h.score)) for h in hits]
 
@@ -124,7 +210,10 @@ def ask(req: AskRequest) -> AskResponse:
                 "doc_id": h.doc_id,
                 "score": float(h.score),
                 "text": h.text,  # keep raw text for transparency
-                "text_clean": clean_excerpt(h.text),  # nicer display option for UI
+                "text_clean": h.text_clean,  # nicer display option for UI
+                "section": h.section,
+                "page_start": h.page_start,
+                "page_end": h.page_end,
             }
         )
 
@@ -136,3 +225,70 @@ def ask(req: AskRequest) -> AskResponse:
         evidence=evidence,
     )
 
+
+@app.post("/compare", response_model=CompareResponse)
+def compare(req: CompareRequest) -> CompareResponse:
+    t0 = time.perf_counter()
+    resp = _compare(req)
+    request_log.log_request(
+        endpoint="/compare",
+        question=req.question,
+        doc_id=None,
+        top_k=req.top_k,
+        latency_ms=(time.perf_counter() - t0) * 1000,
+        hit_ids=[c.chunk_id for g in resp.groups for c in g.citations],
+        refused=resp.refused,
+        doc_ids=req.doc_ids,
+        section=req.section,
+    )
+    return resp
+
+
+def _compare(req: CompareRequest) -> CompareResponse:
+    # One embedding, one selector-restricted search per filing. Unknown doc_ids refuse
+    # with a reason naming them (ValueError from search_grouped).
+    try:
+        grouped = search_grouped(
+            query=req.question, top_k=req.top_k, doc_ids=req.doc_ids, section=req.section
+        )
+        source_by_id = {d["doc_id"]: d for d in list_sources()}
+    except (FileNotFoundError, ValueError) as e:
+        return CompareResponse(refused=True, refusal_reason=str(e), groups=[])
+
+    groups: List[CompareGroup] = []
+    for doc_id, hits in grouped.items():
+        if not hits:
+            continue
+        src = source_by_id.get(doc_id, {})
+        groups.append(
+            CompareGroup(
+                doc_id=doc_id,
+                company=src.get("company"),
+                filing_year=src.get("filing_year"),
+                filing_type=src.get("filing_type"),
+                citations=[Citation(chunk_id=h.chunk_id, doc_id=h.doc_id, score=float(h.score)) for h in hits],
+                evidence=[
+                    {
+                        "chunk_id": h.chunk_id,
+                        "doc_id": h.doc_id,
+                        "score": float(h.score),
+                        "text": h.text,
+                        "text_clean": h.text_clean,
+                        "section": h.section,
+                        "page_start": h.page_start,
+                        "page_end": h.page_end,
+                    }
+                    for h in hits
+                ],
+            )
+        )
+
+    if not groups:
+        return CompareResponse(
+            refused=True,
+            refusal_reason="No relevant evidence retrieved for the requested filings.",
+            groups=[],
+        )
+
+    groups.sort(key=lambda g: (g.company or "", g.filing_year or "", g.doc_id))
+    return CompareResponse(refused=False, refusal_reason=None, groups=groups)
@@ -1,10 +1,13 @@
 # api/rag/chunking.py
 from __future__ import annotations
 
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional, Tuple
 import re
 
+from api.rag.sections import split_sections
+
 
 @dataclass
 class Chunk:
@@ -16,6 +19,10 @@ class Chunk:
     filing_type: str
     text: str
     n_chars: int
+    section: str = ""
+    section_title: str = ""
+    page_start: Optional[int] = None  # 1-based PDF page numbers
+    page_end: Optional[int] = None
 
 
 def clean_text(s: str) -> str:
@@ -25,6 +32,29 @@ def clean_text(s: str) -> str:
     return s.strip()
 
 
+def join_pages(pages: List[str]) -> Tuple[str, List[int], List[int]]:
+    """
+    Cleans each page and joins non-empty pages with a blank line.
+    Returns (text, page_offsets, page_numbers): page_numbers[i] (1-based) starts
+    at char offset page_offsets[i] in text.
+    """
+    parts: List[str] = []
+    offsets: List[int] = []
+    numbers: List[int] = []
+    pos = 0
+    for n, page in enumerate(pages, start=1):
+        t = clean_text(page)
+        if not t:
+            continue
+        if parts:
+            pos += 2  # "\n\n" separator
+        offsets.append(pos)
+        numbers.append(n)
+        parts.append(t)
+        pos += len(t)
+    return "\n\n".join(parts), offsets, numbers
+
+
 def chunk_document_text(
     doc_text: str,
     doc_id: str,
@@ -34,40 +64,60 @@ def chunk_document_text(
     filing_type: str,
     chunk_chars: int = 1400,
     overlap_chars: int = 200,
+    pages: Optional[List[str]] = None,
 ) -> List[Chunk]:
     """
     Character-based chunking with overlap. Deterministic chunk IDs.
+
+    The text is first split at 10-K Item headings and each section is chunked
+    on its own, so no chunk spans two Items. If per-page text is given it is
+    used instead of doc_text and each chunk records its page range.
     """
-    text = clean_text(doc_text)
+    if pages is not None:
+        text, page_offsets, page_numbers = join_pages(pages)
+    else:
+        text, page_offsets, page_numbers = clean_text(doc_text), [], []
     if not text:
         return []
 
+    def page_at(pos: int) -> Optional[int]:
+        if not page_offsets:
+            return None
+        return page_numbers[max(0, bisect_right(page_offsets, pos) - 1)]
+
     chunks: List[Chunk] = []
-    i = 0
-    n = len(text)
     k = 0
 
-    while i < n:
-        j = min(i + chunk_chars, n)
-        chunk_text = text[i:j].strip()
-
-        chunk_id = f"{doc_id}::chunk_{k}"
-        chunks.append(
-            Chunk(
-                chunk_id=chunk_id,
-                doc_id=doc_id,
-                filename=filename,
-                company=company,
-                filing_year=filing_year,
-                filing_type=filing_type,
-                text=chunk_text,
-                n_chars=len(chunk_text),
-            )
-        )
-
-        k += 1
-        if j == n:
-            break
-        i = max(0, j - overlap_chars)
+    for sec in split_sections(text):
+        i = sec.start
+        n = sec.end
+
+        while i < n:
+            j = min(i + chunk_chars, n)
+            chunk_text = text[i:j].strip()
+
+            if chunk_text:
+                chunk_id = f"{doc_id}::chunk_{k}"
+                chunks.append(
+                    Chunk(
+                        chunk_id=chunk_id,
+                        doc_id=doc_id,
+                        filename=filename,
+                        company=company,
+                        filing_year=filing_year,
+                        filing_type=filing_type,
+                        text=chunk_text,
+                        n_chars=len(chunk_text),
+                        section=sec.section,
+                        section_title=sec.title,
+                        page_start=page_at(i),
+                        page_end=page_at(max(i, j - 1)),
+                    )
+                )
+                k += 1
+
+            if j == n:
+                break
+            i = max(sec.start, j - overlap_chars)
 
     return chunks
@@ -0,0 +1,48 @@
+# api/rag/display.py
+"""
+Display text for evidence chunks.
+
+These run once per chunk at build time (scripts/build_chunks.py) and the
+results are stored in chunks.jsonl, so the API only slices precomputed spans.
+"""
+from __future__ import annotations
+
+from typing import Tuple
+
+SNIPPET_MAX_LEN = 320
+
+
+def clean_excerpt(s: str) -> str:
+    # Collapse whitespace and remove weird PDF line breaks/non-breaking spaces
+    return " ".join(s.replace("\u00a0", " ").split())
+
+
+def snippet_span(t: str, max_len: int = SNIPPET_MAX_LEN) -> Tuple[int, int]:
+    """
+    (start, end) offsets of a sentence-safe snippet within cleaned text t.
+    If end < len(t) the snippet was trimmed and should be shown with "...".
+    """
+    start = 0
+
+    # If chunk begins mid-word, skip forward to first space
+    if t and t[0].islower():
+        first_space = t.find(" ")
+        if 0 < first_space < 50:
+            start = first_space + 1
+
+    # Try to start at the first likely sentence start.
+    # Heuristic: find first ". " then start after it, if the beginning looks broken.
+    if start < len(t) and t[start].islower():
+        dot = t.find(". ", start)
+        if 0 <= dot - start < 200:
+            start = dot + 2
+
+    # Trim to max length nicely
+    end = len(t)
+    if end - start > max_len:
+        end = start + len(t[start : start + max_len].rsplit(" ", 1)[0])
+    return start, end
+
+
+def slice_snippet(t: str, start: int, end: int) -> str:
+    return t[start:end] + ("..." if end < len(t) else "")
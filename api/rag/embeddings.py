@@ -9,6 +9,7 @@ from sentence_transformers import SentenceTransformer
 DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 _model: SentenceTransformer | None = None
+_tokenizer = None
 
 
 def get_model(model_name: str = DEFAULT_MODEL_NAME) -> SentenceTransformer:
@@ -27,3 +28,21 @@ def embed_texts(texts: List[str], model_name: str = DEFAULT_MODEL_NAME, batch_si
         normalize_embeddings=True,  # cosine similarity via inner product
     )
     return np.asarray(emb, dtype=np.float32)
+
+
+def get_tokenizer(model_name: str = DEFAULT_MODEL_NAME):
+    """
+    Tokenizer only (no model weights), for cheap length estimates at build time.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        from transformers import AutoTokenizer  # installed with sentence-transformers
+
+        _tokenizer = AutoTokenizer.from_pretrained(model_name)
+    return _tokenizer
+
+
+def token_lengths(texts: List[str], model_name: str = DEFAULT_MODEL_NAME) -> List[int]:
+    tok = get_tokenizer(model_name)
+    enc = tok(texts, add_special_tokens=True, truncation=False)
+    return [len(ids) for ids in enc["input_ids"]]
@@ -2,6 +2,9 @@
 from __future__ import annotations
 
 import json
+import os
+import shutil
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -9,7 +12,10 @@ from typing import Any, Dict, List, Optional, Tuple
 import faiss
 import numpy as np
 
+from api.rag.display import clean_excerpt, slice_snippet, snippet_span
 from api.rag.embeddings import embed_texts
+from api.rag.query_cache import SemanticCache
+from api.rag.sections import normalize_section
 
 INDEX_PATH = Path("data/processed/embeddings.faiss")
 META_PATH = Path("data/processed/embeddings_meta.jsonl")
@@ -21,11 +27,34 @@ class RetrievedChunk:
     doc_id: str
     score: float
     text: str
+    section: Optional[str] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    text_clean: str = ""
+    snippet: str = ""
 
 
-_index: faiss.Index | None = None
-_meta: List[Dict[str, Any]] | None = None
-_text_by_idx: List[str] | None = None
+@dataclass
+class _Store:
+    """
+    One immutable view of the store. It is replaced, never mutated, so a search
+    that grabbed it keeps a consistent index/meta/text set even if a reload or
+    ingest publishes a new one meanwhile.
+    """
+    index: faiss.Index
+    meta: List[Dict[str, Any]]
+    text_by_idx: List[str]
+    clean_by_idx: List[str]
+    snippet_spans: List[Tuple[int, int]]
+    generation: int
+
+
+_store: Optional[_Store] = None
+_generation = 0  # bumped every time a new store is published
+_partition_ids: Dict[Tuple[int, Optional[str], Optional[str]], np.ndarray] = {}
+
+query_cache = SemanticCache()
+_write_lock = threading.RLock()  # serializes loads, reloads and ingest commits
 
 
 def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
@@ -39,12 +68,7 @@ def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
     return rows
 
 
-def load_store() -> Tuple[faiss.Index, List[Dict[str, Any]], List[str]]:
-    global _index, _meta, _text_by_idx
-
-    if _index is not None and _meta is not None and _text_by_idx is not None:
-        return _index, _meta, _text_by_idx
-
+def check_artifacts() -> None:
     if not INDEX_PATH.exists():
         raise FileNotFoundError(f"Missing {INDEX_PATH}. Run: python -m scripts.build_faiss_index")
     if not META_PATH.exists():
@@ -52,17 +76,166 @@ def load_store() -> Tuple[faiss.Index, List[Dict[str, Any]], List[str]]:
     if not CHUNKS_PATH.exists():
         raise FileNotFoundError(f"Missing {CHUNKS_PATH}. Run: python -m scripts.build_chunks")
 
-    _index = faiss.read_index(str(INDEX_PATH))
-    _meta = _read_jsonl(META_PATH)
 
+def read_index() -> faiss.Index:
+    return faiss.read_index(str(INDEX_PATH))
+
+
+def read_meta() -> List[Dict[str, Any]]:
+    return _read_jsonl(META_PATH)
+
+
+def read_chunks() -> List[Dict[str, Any]]:
+    return _read_jsonl(CHUNKS_PATH)
+
+
+def text_columns(chunks: List[Dict[str, Any]]) -> Tuple[List[str], List[str], List[Tuple[int, int]]]:
+    """
+    Raw text, display text and snippet span per FAISS id.
+    """
     # Load only texts in the same order as FAISS ids
-    chunks = _read_jsonl(CHUNKS_PATH)
-    _text_by_idx = [c["text"] for c in chunks]
+    text_by_idx = [c["text"] for c in chunks]
+
+    # Display text is precomputed by build_chunks; older chunks.jsonl files get it here, once.
+    clean_by_idx = [c["text_clean"] if "text_clean" in c else clean_excerpt(c["text"]) for c in chunks]
+    snippet_spans = [
+        (c["snippet_start"], c["snippet_end"]) if "snippet_end" in c else snippet_span(t)
+        for c, t in zip(chunks, clean_by_idx)
+    ]
+    return text_by_idx, clean_by_idx, snippet_spans
+
+
+def check_aligned(index: faiss.Index, meta: List[Dict[str, Any]], text_by_idx: List[str]) -> None:
+    if len(meta) != len(text_by_idx):
+        raise ValueError(f"Meta rows ({len(meta)}) != chunks rows ({len(text_by_idx)}). Rebuild artifacts.")
+    if int(index.ntotal) != len(meta):
+        raise ValueError(f"Index size ({index.ntotal}) != meta rows ({len(meta)}). Rebuild artifacts.")
+
+
+def _read_store() -> Tuple[faiss.Index, List[Dict[str, Any]], List[str], List[str], List[Tuple[int, int]]]:
+    # Each step is a separate function so scripts/profile_serving.py can time the real load path.
+    check_artifacts()
+    index = read_index()
+    meta = read_meta()
+    text_by_idx, clean_by_idx, snippet_spans = text_columns(read_chunks())
+    check_aligned(index, meta, text_by_idx)
+    return index, meta, text_by_idx, clean_by_idx, snippet_spans
+
+
+def _publish(
+    index: faiss.Index,
+    meta: List[Dict[str, Any]],
+    text_by_idx: List[str],
+    clean_by_idx: List[str],
+    snippet_spans: List[Tuple[int, int]],
+) -> _Store:
+    # Swap in a new store, then invalidate the cache for the new generation.
+    # Searches that started on the old store carry the old generation, so their
+    # cache puts are refused and their partition ids are never looked up again.
+    global _store, _generation, _partition_ids
+    _generation += 1
+    _partition_ids = {}
+    _store = _Store(index, meta, text_by_idx, clean_by_idx, snippet_spans, _generation)
+    query_cache.invalidate(_generation)
+    return _store
+
+
+def _current() -> _Store:
+    store = _store
+    if store is None:
+        with _write_lock:
+            store = _store if _store is not None else _publish(*_read_store())
+    return store
+
+
+def load_store() -> Tuple[faiss.Index, List[Dict[str, Any]], List[str]]:
+    store = _current()
+    return store.index, store.meta, store.text_by_idx
+
+
+def reload_store() -> Tuple[faiss.Index, List[Dict[str, Any]], List[str]]:
+    """
+    Reads artifacts from disk again (e.g. after an offline rebuild) and swaps
+    them in. The query cache is invalidated; in-flight searches finish on the
+    store they started with.
+    """
+    with _write_lock:
+        store = _publish(*_read_store())
+    return store.index, store.meta, store.text_by_idx
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(path.name + ".tmp")
 
-    if len(_meta) != len(_text_by_idx):
-        raise ValueError(f"Meta rows ({len(_meta)}) != chunks rows ({len(_text_by_idx)}). Rebuild artifacts.")
 
-    return _index, _meta, _text_by_idx
+def _stage_jsonl_append(path: Path, rows: List[Dict[str, Any]]) -> Path:
+    # Copy + append into a temp file; the live file is untouched until os.replace.
+    tmp = _tmp_path(path)
+    shutil.copyfile(path, tmp)
+    with tmp.open("a", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return tmp
+
+
+def add_to_store(chunk_rows: List[Dict[str, Any]], meta_rows: List[Dict[str, Any]], embs: np.ndarray) -> int:
+    """
+    Appends one filing's chunks to the live store and the on-disk artifacts.
+
+    Readers never take a lock: new lists and a cloned index are built on the
+    side and published as a new store in one assignment. Returns the first
+    new FAISS id.
+    """
+    global _store
+
+    if not (len(chunk_rows) == len(meta_rows) == len(embs)):
+        raise ValueError("chunk rows, meta rows and embeddings must align")
+
+    with _write_lock:
+        store = _current()
+        start = int(store.index.ntotal)
+        if start != len(store.meta):
+            raise ValueError(f"Index size ({start}) != meta rows ({len(store.meta)}). Rebuild artifacts.")
+
+        new_index = faiss.clone_index(store.index)
+        new_index.add(np.asarray(embs, dtype=np.float32))
+
+        # Stage all three artifacts in temp files, then swap them in. A failure while
+        # staging leaves the live files untouched. A failure between the renames is
+        # caught by the row/ntotal checks in load_store, so the in-memory store is
+        # dropped to force that check on the next access.
+        staged: List[Tuple[Path, Path]] = []
+        try:
+            staged.append((_stage_jsonl_append(CHUNKS_PATH, chunk_rows), CHUNKS_PATH))
+            staged.append((_stage_jsonl_append(META_PATH, meta_rows), META_PATH))
+            faiss.write_index(new_index, str(_tmp_path(INDEX_PATH)))
+            staged.append((_tmp_path(INDEX_PATH), INDEX_PATH))
+        except BaseException:
+            for tmp, _ in staged:
+                tmp.unlink(missing_ok=True)
+            _tmp_path(INDEX_PATH).unlink(missing_ok=True)
+            raise
+        try:
+            for tmp, path in staged:
+                os.replace(tmp, path)
+        except BaseException:
+            _store = None
+            raise
+
+        new_clean = [r.get("text_clean") or clean_excerpt(r["text"]) for r in chunk_rows]
+        _publish(
+            new_index,
+            store.meta + list(meta_rows),
+            store.text_by_idx + [r["text"] for r in chunk_rows],
+            store.clean_by_idx + new_clean,
+            store.snippet_spans
+            + [
+                (r["snippet_start"], r["snippet_end"]) if "snippet_end" in r else snippet_span(t)
+                for r, t in zip(chunk_rows, new_clean)
+            ],
+        )
+
+    return start
 
 
 def list_sources() -> List[Dict[str, Any]]:
@@ -79,19 +252,79 @@ def list_sources() -> List[Dict[str, Any]]:
                 "company": m.get("company"),
                 "filing_year": m.get("filing_year"),
                 "filing_type": m.get("filing_type"),
+                "sections": [],
             }
+        section = m.get("section")
+        if section and section not in seen[doc_id]["sections"]:
+            seen[doc_id]["sections"].append(section)
     return [seen[k] for k in sorted(seen.keys())]
 
 
+def _partition(store: _Store, section: Optional[str], doc_id: Optional[str] = None) -> np.ndarray:
+    """
+    FAISS ids of the chunks in one section and/or one filing, cached per store generation.
+    """
+    key = (store.generation, doc_id, section)
+    ids = _partition_ids.get(key)
+    if ids is None:
+        ids = np.asarray(
+            [
+                i
+                for i, m in enumerate(store.meta)
+                if (section is None or m.get("section") == section)
+                and (doc_id is None or m.get("doc_id") == doc_id)
+            ],
+            dtype=np.int64,
+        )
+        _partition_ids[key] = ids
+    return ids
+
+
+def _search_partition(index: faiss.Index, q_emb: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Only the partition's vectors are scored; no over-fetch and post-filter needed.
+    params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids))
+    return index.search(q_emb, k=min(k, len(ids)), params=params)
+
+
+def _to_retrieved(idx: int, score: float, store: _Store) -> RetrievedChunk:
+    m = store.meta[idx]
+    text_clean = store.clean_by_idx[idx]
+    return RetrievedChunk(
+        chunk_id=m.get("chunk_id") or f"{m.get('doc_id')}::chunk_{idx}",
+        doc_id=m.get("doc_id") or "unknown",
+        score=float(score),
+        text=store.text_by_idx[idx],
+        section=m.get("section"),
+        page_start=m.get("page_start"),
+        page_end=m.get("page_end"),
+        text_clean=text_clean,
+        snippet=slice_snippet(text_clean, *store.snippet_spans[idx]),
+    )
+
+
 def search(
     query: str,
     top_k: int = 5,
     doc_id: Optional[str] = None,
+    section: Optional[str] = None,
 ) -> List[RetrievedChunk]:
-    index, meta, text_by_idx = load_store()
+    section = normalize_section(section)
+    store = _current()
+    index, meta = store.index, store.meta
 
     q_emb = embed_texts([query])  # normalized vectors
-    D, I = index.search(np.asarray(q_emb, dtype=np.float32), k=max(top_k * 6, top_k))
+    scope = ("search", doc_id, section)
+    cached = query_cache.get(scope, q_emb[0], top_k)
+    if cached is not None:
+        return cached[:top_k]
+
+    if section is not None:
+        ids = _partition(store, section, doc_id)
+        if len(ids) == 0:
+            return []
+        D, I = _search_partition(index, np.asarray(q_emb, dtype=np.float32), ids, top_k)
+    else:
+        D, I = index.search(np.asarray(q_emb, dtype=np.float32), k=max(top_k * 6, top_k))
 
     results: List[RetrievedChunk] = []
     for score, idx in zip(D[0].tolist(), I[0].tolist()):
@@ -101,16 +334,60 @@ def search(
         if doc_id is not None and m.get("doc_id") != doc_id:
             continue
 
-        results.append(
-            RetrievedChunk(
-                chunk_id=m.get("chunk_id") or f"{m.get('doc_id')}::chunk_{idx}",
-                doc_id=m.get("doc_id") or "unknown",
-                score=float(score),
-                text=text_by_idx[idx],
-            )
-        )
+        results.append(_to_retrieved(idx, score, store))
         if len(results) >= top_k:
             break
 
+    query_cache.put(scope, q_emb[0], top_k, results, generation=store.generation)
     return results
 
+
+def search_grouped(
+    query: str,
+    top_k: int = 3,
+    doc_ids: Optional[List[str]] = None,
+    section: Optional[str] = None,
+) -> Dict[str, List[RetrievedChunk]]:
+    """
+    Top-k hits per filing for a single question.
+
+    The question is embedded once. Each filing is then searched through its own
+    id selector (filing, plus section when given), so every vector of the
+    requested filings is scored exactly once, other filings are never touched,
+    and each filing gets top_k hits whenever it has that many chunks.
+
+    Raises ValueError naming any doc_ids that are not in the index.
+    """
+    section = normalize_section(section)
+    store = _current()
+    index, meta = store.index, store.meta
+
+    known = sorted({m["doc_id"] for m in meta if m.get("doc_id")})  # same order as list_sources()
+    if doc_ids is None:
+        wanted = known
+    else:
+        wanted = list(dict.fromkeys(doc_ids))
+        known_set = set(known)
+        unknown = [d for d in wanted if d not in known_set]
+        if unknown:
+            raise ValueError(f"Unknown doc_ids: {', '.join(unknown)}")
+    if not wanted or top_k <= 0:
+        return {}
+
+    q_emb = np.asarray(embed_texts([query]), dtype=np.float32)
+    scope = ("grouped", tuple(wanted), section)
+    cached = query_cache.get(scope, q_emb[0], top_k)
+    if cached is not None:
+        return {d: hits[:top_k] for d, hits in cached.items()}
+
+    grouped: Dict[str, List[RetrievedChunk]] = {}
+    for d in wanted:
+        ids = _partition(store, section, d)
+        if len(ids) == 0:
+            grouped[d] = []
+            continue
+        D, I = _search_partition(index, q_emb, ids, top_k)
+        grouped[d] = [_to_retrieved(idx, score, store) for score, idx in zip(D[0].tolist(), I[0].tolist()) if idx >= 0]
+
+    query_cache.put(scope, q_emb[0], top_k, grouped, generation=store.generation)
+    return grouped
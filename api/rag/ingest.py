@@ -0,0 +1,116 @@
+# api/rag/ingest.py
+"""
+Single-filing ingestion pipeline: PDF -> chunk rows -> embeddings.
+
+Shared by the offline build scripts and the online /ingest worker so both
+write the same chunks.jsonl / embeddings_meta.jsonl row format.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from api.rag.chunking import Chunk, chunk_document_text
+from api.rag.display import clean_excerpt, snippet_span
+from api.rag.embeddings import DEFAULT_MODEL_NAME, embed_texts
+from api.rag.pdf_text import DEFAULT_BACKEND, extract_pdf_pages
+
+META_FIELDS = (
+    "chunk_id",
+    "doc_id",
+    "filename",
+    "company",
+    "filing_year",
+    "filing_type",
+    "n_chars",
+    "section",
+    "section_title",
+    "page_start",
+    "page_end",
+)
+
+
+def infer_metadata(doc_id: str, filename: str) -> Dict[str, str]:
+    """
+    Tries to parse: Company_2023_10K.pdf from doc_id or filename.
+    If it can't infer, falls back safely.
+    """
+    stem = Path(filename).stem
+    tokens = stem.replace("-", "_").split("_")
+
+    company = tokens[0] if tokens else doc_id
+    filing_year = "unknown"
+    filing_type = "10K"
+
+    for t in tokens:
+        if t.isdigit() and len(t) == 4:
+            filing_year = t
+        if t.upper() in {"10K", "10Q"}:
+            filing_type = t.upper()
+
+    return {
+        "company": company,
+        "filing_year": filing_year,
+        "filing_type": filing_type,
+    }
+
+
+def chunk_to_row(c: Chunk) -> Dict[str, Any]:
+    """
+    One chunks.jsonl row, including precomputed display text and snippet span.
+    """
+    text_clean = clean_excerpt(c.text)
+    snippet_start, snippet_end = snippet_span(text_clean)
+    return {
+        "chunk_id": c.chunk_id,
+        "doc_id": c.doc_id,
+        "filename": c.filename,
+        "company": c.company,
+        "filing_year": c.filing_year,
+        "filing_type": c.filing_type,
+        "n_chars": c.n_chars,
+        "section": c.section,
+        "section_title": c.section_title,
+        "page_start": c.page_start,
+        "page_end": c.page_end,
+        "text": c.text,
+        "text_clean": text_clean,
+        "snippet_start": snippet_start,
+        "snippet_end": snippet_end,
+    }
+
+
+def meta_from_row(r: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The embeddings_meta.jsonl row for a chunks.jsonl row (FAISS id == line number).
+    """
+    return {k: r.get(k) for k in META_FIELDS}
+
+
+def chunk_pdf(
+    pdf_path: Path,
+    doc_id: str,
+    backend: str = DEFAULT_BACKEND,
+    chunk_chars: int = 1400,
+    overlap_chars: int = 200,
+) -> List[Dict[str, Any]]:
+    pages = extract_pdf_pages(pdf_path, backend=backend)
+    meta = infer_metadata(doc_id=doc_id, filename=pdf_path.name)
+    chunks = chunk_document_text(
+        doc_text="",
+        doc_id=doc_id,
+        filename=pdf_path.name,
+        company=meta["company"],
+        filing_year=meta["filing_year"],
+        filing_type=meta["filing_type"],
+        chunk_chars=chunk_chars,
+        overlap_chars=overlap_chars,
+        pages=pages,
+    )
+    return [chunk_to_row(c) for c in chunks]
+
+
+def embed_rows(rows: List[Dict[str, Any]], batch_size: int = 32) -> np.ndarray:
+    return embed_texts([r["text"] for r in rows], model_name=DEFAULT_MODEL_NAME, batch_size=batch_size)
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 import pdfplumber
 
+# A backend takes (pdf_path, max_pages) and returns one string per page, in order.
+PdfBackend = Callable[[Path, "int | None"], List[str]]
+
+DEFAULT_BACKEND = "pdfplumber"
+
 
 @dataclass
 class Document:
     doc_id: str
     filename: str
     text: str
+    pages: List[str] = field(default_factory=list)  # raw text per PDF page
 
 
 def list_pdfs(raw_dir: Path) -> List[Path]:
@@ -20,27 +26,88 @@ def list_pdfs(raw_dir: Path) -> List[Path]:
     return sorted([p for p in raw_dir.iterdir() if p.suffix.lower() == ".pdf"])
 
 
-def extract_pdf_text(pdf_path: Path, max_pages: int | None = None) -> str:
-    pages_text: List[str] = []
-
+def _pages_pdfplumber(pdf_path: Path, max_pages: int | None = None) -> List[str]:
+    pages: List[str] = []
     with pdfplumber.open(str(pdf_path)) as pdf:
         n_pages = len(pdf.pages)
         limit = n_pages if max_pages is None else min(n_pages, max_pages)
+        for i in range(limit):
+            pages.append(pdf.pages[i].extract_text() or "")
+    return pages
+
+
+def _pages_pypdfium2(pdf_path: Path, max_pages: int | None = None) -> List[str]:
+    import pypdfium2 as pdfium  # installed alongside pdfplumber
+
+    pages: List[str] = []
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        n_pages = len(pdf)
+        limit = n_pages if max_pages is None else min(n_pages, max_pages)
+        for i in range(limit):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            # pdfium ends lines with \r\n; match the \n-only text of the other backends
+            pages.append((textpage.get_text_range() or "").replace("\r\n", "\n").replace("\r", "\n"))
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    return pages
+
 
+def _pages_pymupdf(pdf_path: Path, max_pages: int | None = None) -> List[str]:
+    import fitz  # optional: pip install pymupdf
+
+    pages: List[str] = []
+    with fitz.open(str(pdf_path)) as pdf:
+        n_pages = pdf.page_count
+        limit = n_pages if max_pages is None else min(n_pages, max_pages)
         for i in range(limit):
-            page = pdf.pages[i]
-            txt = page.extract_text() or ""
-            txt = txt.strip()
-            if txt:
-                pages_text.append(txt)
+            pages.append(pdf[i].get_text() or "")
+    return pages
+
+
+BACKENDS: Dict[str, PdfBackend] = {
+    "pdfplumber": _pages_pdfplumber,
+    "pypdfium2": _pages_pypdfium2,
+    "pymupdf": _pages_pymupdf,
+}
+
+
+def get_backend(name: str) -> PdfBackend:
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown PDF backend {name!r}. Choose from: {', '.join(sorted(BACKENDS))}") from None
+
+
+def extract_pdf_pages(pdf_path: Path, max_pages: int | None = None, backend: str = DEFAULT_BACKEND) -> List[str]:
+    """
+    Raw text per page (empty string for pages with no text), in page order.
+    """
+    return get_backend(backend)(pdf_path, max_pages)
+
+
+def extract_pdf_text(pdf_path: Path, max_pages: int | None = None, backend: str = DEFAULT_BACKEND) -> str:
+    pages_text: List[str] = []
+    for txt in extract_pdf_pages(pdf_path, max_pages=max_pages, backend=backend):
+        txt = txt.strip()
+        if txt:
+            pages_text.append(txt)
 
     return "\n\n".join(pages_text)
 
 
-def load_documents(raw_dir: Path, max_pages: int | None = None) -> Dict[str, Document]:
+def load_documents(
+    raw_dir: Path,
+    max_pages: int | None = None,
+    backend: str = DEFAULT_BACKEND,
+) -> Dict[str, Document]:
     docs: Dict[str, Document] = {}
     for pdf_path in list_pdfs(raw_dir):
         doc_id = pdf_path.stem
-        text = extract_pdf_text(pdf_path, max_pages=max_pages)
-        docs[doc_id] = Document(doc_id=doc_id, filename=pdf_path.name, text=text)
+        pages = extract_pdf_pages(pdf_path, max_pages=max_pages, backend=backend)
+        text = "\n\n".join(t.strip() for t in pages if t.strip())
+        docs[doc_id] = Document(doc_id=doc_id, filename=pdf_path.name, text=text, pages=pages)
     return docs
@@ -0,0 +1,99 @@
+# api/rag/query_cache.py
+"""
+Semantic query cache.
+
+Keeps the embeddings of recent queries with their results. A new query reuses
+a cached result when it has the same scope (doc filter, section, ...) and its
+cosine similarity to the cached query is at least the threshold. The cache is
+LRU-bounded and must be invalidated whenever the index changes. Each
+invalidation starts a new store generation; results computed against an
+older generation are refused by put().
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+# Override without code changes, e.g. RAG_CACHE_THRESHOLD=0.97 uvicorn api.main:app
+DEFAULT_THRESHOLD = float(os.environ.get("RAG_CACHE_THRESHOLD", "0.95"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RAG_CACHE_MAX_ENTRIES", "256"))
+
+
+@dataclass
+class _Entry:
+    scope: Hashable
+    emb: np.ndarray  # normalized query embedding, shape (dim,)
+    top_k: int
+    value: Any
+
+
+class SemanticCache:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    def get(self, scope: Hashable, emb: np.ndarray, top_k: int) -> Optional[Any]:
+        """
+        Cached value for the most similar query in scope whose top_k covers the
+        request, or None. emb must be L2-normalized (dot product == cosine).
+        """
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if e.scope == scope and e.top_k >= top_k]
+            if keys:
+                sims = np.stack([self._entries[k].emb for k in keys]) @ emb
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    key = keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key].value
+            self.misses += 1
+            return None
+
+    def put(self, scope: Hashable, emb: np.ndarray, top_k: int, value: Any, generation: Optional[int] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return  # computed on a store that has since been replaced
+            self._entries[next(self._ids)] = _Entry(scope, np.asarray(emb, dtype=np.float32).ravel(), top_k, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, generation: Optional[int] = None) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+            self.generation = self.generation + 1 if generation is None else generation
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "generation": self.generation,
+            }
@@ -0,0 +1,252 @@
+# api/rag/sections.py
+"""
+10-K Item detection.
+
+Finds Item headings and splits the filing into sections, so chunks never
+straddle two Items and retrieval can be restricted to one of them. Two heading
+styles are recognised: "Item 1A. Risk Factors" (anywhere in a line, since
+two-column pages get merged line by line) and a bare title like "Risk Factors"
+at the start of a line, as used by filings whose headings carry no Item number.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+FRONT_SECTION = "front"
+
+ITEM_TITLES: Dict[str, str] = {
+    "1": "Business",
+    "1A": "Risk Factors",
+    "1B": "Unresolved Staff Comments",
+    "1C": "Cybersecurity",
+    "2": "Properties",
+    "3": "Legal Proceedings",
+    "4": "Mine Safety Disclosures",
+    "5": "Market for Registrant's Common Equity",
+    "6": "[Reserved]",
+    "7": "Management's Discussion and Analysis",
+    "7A": "Quantitative and Qualitative Disclosures About Market Risk",
+    "8": "Financial Statements and Supplementary Data",
+    "9": "Changes in and Disagreements with Accountants",
+    "9A": "Controls and Procedures",
+    "9B": "Other Information",
+    "9C": "Disclosure Regarding Foreign Jurisdictions that Prevent Inspections",
+    "10": "Directors, Executive Officers and Corporate Governance",
+    "11": "Executive Compensation",
+    "12": "Security Ownership of Certain Beneficial Owners and Management",
+    "13": "Certain Relationships and Related Transactions",
+    "14": "Principal Accountant Fees and Services",
+    "15": "Exhibits and Financial Statement Schedules",
+    "16": "Form 10-K Summary",
+}
+
+SECTION_ALIASES: Dict[str, str] = {
+    "business": "item_1",
+    "risk_factors": "item_1a",
+    "risk": "item_1a",
+    "cybersecurity": "item_1c",
+    "legal_proceedings": "item_3",
+    "mda": "item_7",
+    "md&a": "item_7",
+    "mdna": "item_7",
+    "market_risk": "item_7a",
+    "financial_statements": "item_8",
+    "controls": "item_9a",
+    "exhibits": "item_15",
+}
+
+# "Item 7." / "ITEM 1A:" with the title after it. Cross-references ("Item 1A of
+# this Form 10-K", "Item 15(b)", "Item 7, “Management’s ...") have no such
+# punctuation and the title check below rejects the rest.
+_ITEM_HEADING_RE = re.compile(
+    r"(?:^|(?<=[ \t]))ITEM[ \t]+(1[0-6]|[1-9][A-C]?)[ \t]*[.:\-–—][ \t]*([^\n]*)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# "... in Part I, Item 1A. Risk Factors" is still a reference, not a heading.
+_CROSS_REF_TAIL_RE = re.compile(r"(?:\bPart[ \t]+[IV]+,?|\bsee|\bin|\bunder)[ \t]*$", re.IGNORECASE)
+
+# Words of the title compared against the text after a heading; long titles
+# wrap or get abbreviated ("... Disclosures about Risk"), their start does not.
+_TITLE_WORDS = 3
+_TITLE_MIN_RATIO = 0.85
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.replace("’", "'").replace("‘", "'").split())
+
+
+def _title_prefix(item: str) -> str:
+    return " ".join(_norm(ITEM_TITLES[item]).split()[:_TITLE_WORDS])
+
+
+def _title_matches(item: str, rest: str) -> bool:
+    prefix = _title_prefix(item).lower()
+    head = _norm(rest)[: len(prefix)].lower()
+    return SequenceMatcher(None, head, prefix).ratio() >= _TITLE_MIN_RATIO
+
+
+def _title_only_re() -> re.Pattern:
+    # One alternative per Item: the title (or its first words) in title case or
+    # upper case at the start of a line. A full short title must not run on
+    # into a capitalised word, so "Business Segments" is not "Business".
+    alts = []
+    for item, title in ITEM_TITLES.items():
+        prefix = _title_prefix(item)
+        for form in dict.fromkeys([prefix, prefix.upper()]):
+            pat = re.escape(form).replace("'", "['’]")
+            if prefix == _norm(title):
+                pat += r"(?![ \t]*[A-Z0-9])"
+            alts.append(f"(?P<i{len(alts)}_{item}>{pat})")
+    return re.compile(r"^[ \t]*(?:" + "|".join(alts) + r")", re.MULTILINE)
+
+
+_TITLE_ONLY_RE = _title_only_re()
+
+# Table-of-contents entries sit a line or two apart; real headings are followed by prose.
+_MIN_SECTION_CHARS = 400
+
+_ITEM_ORDER = {item: n for n, item in enumerate(ITEM_TITLES)}
+
+
+@dataclass
+class Section:
+    section: str  # e.g. "item_1a" or "front"
+    title: str
+    start: int  # char offsets into the text
+    end: int
+
+
+def section_key(item: str) -> str:
+    return f"item_{item.lower()}"
+
+
+def section_title(section: str) -> str:
+    if section == FRONT_SECTION:
+        return "Cover and Table of Contents"
+    return ITEM_TITLES.get(section.replace("item_", "").upper(), section)
+
+
+def normalize_section(value: Optional[str]) -> Optional[str]:
+    """
+    Accepts "1A", "Item 1A", "item_1a" or an alias like "risk_factors".
+    Returns the canonical key ("item_1a") or None if value is empty.
+    """
+    if value is None:
+        return None
+    v = value.strip().lower()
+    if not v:
+        return None
+    if v in SECTION_ALIASES:
+        return SECTION_ALIASES[v]
+    if v == FRONT_SECTION:
+        return v
+    v = re.sub(r"^item[\s_]*", "", v)
+    if v.upper() in ITEM_TITLES:
+        return section_key(v)
+    raise ValueError(f"Unknown section {value!r}. Use an Item number like '1A' or one of: {', '.join(sorted(SECTION_ALIASES))}")
+
+
+def _in_item_order(headings: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+    """
+    Longest run of headings whose Item numbers strictly increase, preferring
+    later positions on ties. Drops leftover TOC lines and stray cross-references.
+    """
+    if not headings:
+        return []
+    order = [_ITEM_ORDER[item] for _, item in headings]
+    best = [1] * len(headings)
+    prev = [-1] * len(headings)
+    for i in range(len(headings)):
+        for j in range(i):
+            if order[j] < order[i] and best[j] + 1 >= best[i]:
+                best[i], prev[i] = best[j] + 1, j
+
+    i = max(range(len(headings)), key=lambda n: (best[n], n))
+    chain: List[Tuple[int, str]] = []
+    while i >= 0:
+        chain.append(headings[i])
+        i = prev[i]
+    return chain[::-1]
+
+
+# Lower-case words allowed in a title-case heading line.
+_MINOR_WORDS = {"a", "about", "an", "and", "by", "for", "in", "of", "on", "or", "that", "the", "to", "with"}
+
+
+def _toc_row(rest: str) -> bool:
+    # "Risk Factors 1A 13", "Business I 1 5", "... About Market Risk 124": the
+    # title followed by an Item or page number is a table-of-contents row.
+    return re.search(r"(?<![\w,.-])\d{1,3}[A-C]?(?![\w,-])", rest) is not None
+
+
+def _is_title_line(line: str) -> bool:
+    words = re.findall(r"[A-Za-z][\w'’&-]*", line)
+    return all(w[0].isupper() or w in _MINOR_WORDS for w in words)
+
+
+def _opens_page(text: str, pos: int) -> bool:
+    # Pages are joined with a blank line; allow one running header line above.
+    block_start = text.rfind("\n\n", 0, pos)
+    block_start = 0 if block_start < 0 else block_start + 2
+    return text.count("\n", block_start, pos) <= 1
+
+
+def _candidates(text: str) -> List[Tuple[int, str]]:
+    found: Dict[int, str] = {}
+    for m in _ITEM_HEADING_RE.finditer(text):
+        item = m.group(1).upper()
+        line_start = text.rfind("\n", 0, m.start()) + 1
+        if _CROSS_REF_TAIL_RE.search(text, line_start, m.start()):
+            continue
+        if _title_matches(item, m.group(2)):
+            found[m.start()] = item
+
+    # A bare title counts when its line is a heading on its own, or when it opens
+    # a page (pdfplumber merges the heading with the other column's text).
+    for m in _TITLE_ONLY_RE.finditer(text):
+        item = m.lastgroup.split("_", 1)[1]
+        line_end = text.find("\n", m.end())
+        line_end = len(text) if line_end < 0 else line_end
+        if _toc_row(text[m.end() : line_end]):
+            continue
+        if _is_title_line(text[m.start() : line_end]) or _opens_page(text, m.start()):
+            found.setdefault(m.start(m.lastgroup), item)
+
+    return sorted(found.items())
+
+
+def split_sections(text: str) -> List[Section]:
+    """
+    Partitions text into contiguous Item sections covering [0, len(text)).
+    Candidates closer than _MIN_SECTION_CHARS to the next heading (table of
+    contents, running headers) are dropped, repeats of the same Item keep their
+    first occurrence (page headers repeating the title), then only headings in
+    Item order are kept.
+    """
+    candidates = _candidates(text)
+
+    headings: List[Tuple[int, str]] = []
+    for n, (pos, item) in enumerate(candidates):
+        next_pos = candidates[n + 1][0] if n + 1 < len(candidates) else len(text)
+        if next_pos - pos < _MIN_SECTION_CHARS:
+            continue
+        if headings and headings[-1][1] == item:
+            continue
+        headings.append((pos, item))
+    headings = _in_item_order(headings)
+
+    sections: List[Section] = []
+    if not headings or headings[0][0] > 0:
+        first = headings[0][0] if headings else len(text)
+        sections.append(Section(FRONT_SECTION, section_title(FRONT_SECTION), 0, first))
+
+    for n, (pos, item) in enumerate(headings):
+        end = headings[n + 1][0] if n + 1 < len(headings) else len(text)
+        key = section_key(item)
+        sections.append(Section(key, section_title(key), pos, end))
+
+    return [s for s in sections if s.end > s.start]
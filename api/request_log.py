@@ -0,0 +1,129 @@
+# api/request_log.py
+"""
+Non-blocking structured request log.
+
+Handlers call `log_request(...)`, which only puts a dict on an in-memory queue.
+A daemon thread drains the queue and appends JSON lines in batches, so disk I/O
+never runs on the request path. If the queue is full, records are dropped and
+counted rather than blocking the caller.
+"""
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+LOG_PATH = Path("data/logs/ask_requests.jsonl")
+
+MAX_QUEUE = 10_000
+BATCH_SIZE = 256
+FLUSH_INTERVAL_S = 1.0
+
+
+class RequestLogger:
+    def __init__(
+        self,
+        path: Path = LOG_PATH,
+        max_queue: int = MAX_QUEUE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.dropped = 0
+        self.written = 0
+        self._q: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="request-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def log(self, record: Dict[str, Any]) -> None:
+        try:
+            self._q.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            for r in batch:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        self.written += len(batch)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._q.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            try:
+                self._write(self._drain(first))
+            except OSError:
+                # Logging must never take the API down; keep serving.
+                pass
+
+
+_logger = RequestLogger()
+
+
+def start() -> None:
+    _logger.start()
+
+
+def stop() -> None:
+    _logger.stop()
+
+
+def log_request(
+    endpoint: str,
+    question: str,
+    doc_id: Optional[str],
+    top_k: int,
+    latency_ms: float,
+    hit_ids: List[str],
+    refused: bool,
+    **extra: Any,
+) -> None:
+    record: Dict[str, Any] = {
+        "ts": time.time(),
+        "endpoint": endpoint,
+        "question": question,
+        "doc_id": doc_id,
+        "top_k": top_k,
+        "latency_ms": round(latency_ms, 2),
+        "hit_ids": hit_ids,
+        "refused": refused,
+    }
+    record.update(extra)
+    _logger.log(record)
+
+
+def stats() -> Dict[str, int]:
+    return {"written": _logger.written, "dropped": _logger.dropped, "queued": _logger._q.qsize()}
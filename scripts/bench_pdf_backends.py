@@ -0,0 +1,130 @@
+# scripts/bench_pdf_backends.py
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from api.rag.pdf_text import BACKENDS, DEFAULT_BACKEND, extract_pdf_pages, list_pdfs
+
+RAW_DIR = Path("data/raw")
+
+
+def _words(text: str) -> Counter:
+    return Counter(text.lower().split())
+
+
+def word_similarity(reference: str, candidate: str) -> Dict[str, float]:
+    """
+    Bag-of-words overlap against the reference text.
+    recall: share of reference words the candidate kept (content loss shows up here).
+    precision: share of candidate words found in the reference (junk/duplication).
+    """
+    ref = _words(reference)
+    cand = _words(candidate)
+    overlap = sum((ref & cand).values())
+    n_ref = sum(ref.values())
+    n_cand = sum(cand.values())
+    recall = overlap / n_ref if n_ref else 1.0
+    precision = overlap / n_cand if n_cand else 1.0
+    f1 = 2 * recall * precision / (recall + precision) if (recall + precision) else 0.0
+    return {"recall": round(recall, 4), "precision": round(precision, 4), "f1": round(f1, 4)}
+
+
+def _proc_status_mb(field: str) -> Optional[float]:
+    # VmRSS = current resident set, VmHWM = peak resident set of this process (Linux)
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_backend(pdf_path: Path, backend: str, max_pages: int | None, text_out: Path) -> Dict[str, Any]:
+    """
+    Runs in a fresh process (see measure()). Peak RSS minus the RSS right before
+    extraction covers native allocations (pdfium, MuPDF) that tracemalloc misses.
+    """
+    baseline = _proc_status_mb("VmRSS")
+    t0 = time.perf_counter()
+    try:
+        pages = extract_pdf_pages(pdf_path, max_pages=max_pages, backend=backend)
+    except ImportError as e:
+        return {"backend": backend, "error": f"not installed: {e}"}
+    elapsed = time.perf_counter() - t0
+    peak = _proc_status_mb("VmHWM")
+
+    text_out.write_text("\n\n".join(p.strip() for p in pages if p.strip()), encoding="utf-8")
+    return {
+        "backend": backend,
+        "pages": len(pages),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(pages) / elapsed, 2) if elapsed > 0 else None,
+        "rss_baseline_mb": round(baseline, 1) if baseline is not None else None,
+        "rss_peak_growth_mb": round(peak - baseline, 1) if peak is not None and baseline is not None else None,
+    }
+
+
+def measure(pdf_path: Path, backend: str, max_pages: int | None, text_out: Path) -> Dict[str, Any]:
+    # One subprocess per (pdf, backend) so each peak RSS starts from a clean process.
+    cmd = [sys.executable, "-m", "scripts.bench_pdf_backends", "--_single", str(pdf_path), backend, str(text_out)]
+    if max_pages is not None:
+        cmd += ["--max-pages", str(max_pages)]
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text backends on data/raw")
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--out", type=Path, default=None, help="Optional path to write the JSON report")
+    parser.add_argument("--_single", nargs=3, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._single is not None:
+        pdf, backend, text_out = args._single
+        print(json.dumps(run_backend(Path(pdf), backend, args.max_pages, Path(text_out))))
+        return
+
+    pdfs = list_pdfs(RAW_DIR)
+    if not pdfs:
+        raise FileNotFoundError(f"No PDFs found in {RAW_DIR.resolve()}")
+
+    # pdfplumber is the reference for similarity, so always run it first
+    backends = [DEFAULT_BACKEND] + [b for b in args.backends if b != DEFAULT_BACKEND]
+
+    report: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pdf_path in pdfs:
+            reference: Optional[str] = None
+            for b in backends:
+                text_out = Path(tmp) / f"{pdf_path.stem}.{b}.txt"
+                r = measure(pdf_path, b, args.max_pages, text_out)
+                if "error" not in r:
+                    text = text_out.read_text(encoding="utf-8")
+                    if b == DEFAULT_BACKEND:
+                        reference = text
+                    r["chars"] = len(text)
+                    r["similarity_to_pdfplumber"] = word_similarity(reference, text) if reference is not None else None
+                r["filename"] = pdf_path.name
+                report.append(r)
+                print(json.dumps(r))
+
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nWrote report to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
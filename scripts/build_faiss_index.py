@@ -1,21 +1,29 @@
 # scripts/build_faiss_index.py
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import multiprocessing as mp
+import os
+import shutil
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 import numpy as np
 import faiss
 from tqdm import tqdm
 
-from api.rag.embeddings import embed_texts, DEFAULT_MODEL_NAME
+from api.rag.embeddings import embed_texts, token_lengths, DEFAULT_MODEL_NAME
+from api.rag.ingest import meta_from_row
 
 CHUNKS_PATH = Path("data/processed/chunks.jsonl")
 INDEX_PATH = Path("data/processed/embeddings.faiss")
 META_PATH = Path("data/processed/embeddings_meta.jsonl")
+SHARDS_DIR = Path("data/processed/embedding_shards")
 
 BATCH_SIZE = 32
+SHARD_SIZE = 512
 
 
 def read_jsonl(path: Path) -> List[Dict[str, Any]]:
@@ -29,7 +37,134 @@ def read_jsonl(path: Path) -> List[Dict[str, Any]]:
     return rows
 
 
+def build_fingerprint(texts: List[str], model_name: str, shard_size: int) -> str:
+    """
+    Identifies the exact input of a build. Shards from a different fingerprint
+    (chunks changed, other model, other shard layout) are never reused.
+    """
+    h = hashlib.sha256()
+    h.update(f"{model_name}|{shard_size}|{len(texts)}".encode("utf-8"))
+    for t in texts:
+        h.update(hashlib.sha1(t.encode("utf-8")).digest())
+    return h.hexdigest()
+
+
+def plan_shards(texts: List[str], model_name: str, shard_size: int) -> List[List[int]]:
+    """
+    Sort chunk positions by token length and cut into shards. Each encode batch
+    then holds texts of similar length, so little compute is spent on padding.
+    """
+    lengths = token_lengths(texts, model_name=model_name)
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+    return [order[i : i + shard_size] for i in range(0, len(order), shard_size)]
+
+
+def _shard_path(shards_dir: Path, shard_no: int) -> Path:
+    return shards_dir / f"shard_{shard_no:05d}.npz"
+
+
+def _save_shard(path: Path, ids: List[int], embs: np.ndarray) -> None:
+    # Write then rename so a crash mid-write never leaves a readable partial shard
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, ids=np.asarray(ids, dtype=np.int64), embs=embs)
+    os.replace(tmp, path)
+
+
+_worker_texts: List[str] = []
+_worker_args: Tuple[str, int, str] = ("", BATCH_SIZE, "")
+
+
+def _init_worker(texts: List[str], model_name: str, batch_size: int, shards_dir: str, n_threads: int) -> None:
+    global _worker_texts, _worker_args
+    import torch
+
+    torch.set_num_threads(n_threads)
+    _worker_texts = texts
+    _worker_args = (model_name, batch_size, shards_dir)
+
+
+def _encode_shard(job: Tuple[int, List[int]]) -> int:
+    shard_no, ids = job
+    model_name, batch_size, shards_dir = _worker_args
+    embs = embed_texts([_worker_texts[i] for i in ids], model_name=model_name, batch_size=batch_size)
+    _save_shard(_shard_path(Path(shards_dir), shard_no), ids, embs)
+    return shard_no
+
+
+def prepare_shards_dir(shards_dir: Path, fingerprint: str, fresh: bool) -> None:
+    manifest = shards_dir / "manifest.json"
+    if shards_dir.exists() and not fresh and manifest.exists():
+        try:
+            if json.loads(manifest.read_text(encoding="utf-8")).get("fingerprint") == fingerprint:
+                return
+        except ValueError:
+            pass
+    if shards_dir.exists():
+        shutil.rmtree(shards_dir)
+    shards_dir.mkdir(parents=True, exist_ok=True)
+    manifest.write_text(json.dumps({"fingerprint": fingerprint}), encoding="utf-8")
+
+
+def embed_all(
+    texts: List[str],
+    model_name: str,
+    batch_size: int,
+    shard_size: int,
+    workers: int,
+    shards_dir: Path,
+    fresh: bool = False,
+) -> np.ndarray:
+    fingerprint = build_fingerprint(texts, model_name, shard_size)
+    prepare_shards_dir(shards_dir, fingerprint, fresh)
+
+    shards = plan_shards(texts, model_name, shard_size)
+    pending = [(n, ids) for n, ids in enumerate(shards) if not _shard_path(shards_dir, n).exists()]
+    done = len(shards) - len(pending)
+    if done:
+        print(f"Resuming: {done}/{len(shards)} shards already embedded")
+
+    with tqdm(total=len(shards), initial=done, desc="Embedding shards") as bar:
+        if workers <= 1:
+            _init_worker(texts, model_name, batch_size, str(shards_dir), n_threads=os.cpu_count() or 1)
+            for job in pending:
+                _encode_shard(job)
+                bar.update(1)
+        else:
+            n_threads = max(1, (os.cpu_count() or 1) // workers)
+            ctx = mp.get_context("spawn")
+            with ctx.Pool(
+                processes=workers,
+                initializer=_init_worker,
+                initargs=(texts, model_name, batch_size, str(shards_dir), n_threads),
+            ) as pool:
+                for _ in pool.imap_unordered(_encode_shard, pending):
+                    bar.update(1)
+
+    # Reassemble in chunk order: row i of X is chunks.jsonl line i (== FAISS id)
+    X: np.ndarray | None = None
+    filled = 0
+    for n in range(len(shards)):
+        with np.load(_shard_path(shards_dir, n)) as z:
+            ids, embs = z["ids"], z["embs"]
+        if X is None:
+            X = np.empty((len(texts), embs.shape[1]), dtype=np.float32)
+        X[ids] = embs
+        filled += len(ids)
+
+    if X is None or filled != len(texts):
+        raise ValueError(f"Embedded {filled} of {len(texts)} chunks. Re-run with --fresh.")
+    return X
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Embed chunks.jsonl and build the FAISS index")
+    parser.add_argument("--workers", type=int, default=1, help="Encoding processes (each loads its own model)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Chunks per checkpoint shard")
+    parser.add_argument("--fresh", action="store_true", help="Ignore existing checkpoint shards")
+    parser.add_argument("--keep-shards", action="store_true", help="Keep checkpoint shards after a successful build")
+    args = parser.parse_args()
+
     if not CHUNKS_PATH.exists():
         raise FileNotFoundError(f"Missing {CHUNKS_PATH}. Run chunking first.")
 
@@ -39,14 +174,15 @@ def main():
 
     texts = [r["text"] for r in rows]
 
-    # Embed in batches
-    all_embs: List[np.ndarray] = []
-    for i in tqdm(range(0, len(texts), BATCH_SIZE), desc="Embedding"):
-        batch = texts[i : i + BATCH_SIZE]
-        embs = embed_texts(batch, model_name=DEFAULT_MODEL_NAME, batch_size=BATCH_SIZE)
-        all_embs.append(embs)
-
-    X = np.vstack(all_embs).astype(np.float32)
+    X = embed_all(
+        texts,
+        model_name=DEFAULT_MODEL_NAME,
+        batch_size=args.batch_size,
+        shard_size=args.shard_size,
+        workers=args.workers,
+        shards_dir=SHARDS_DIR,
+        fresh=args.fresh,
+    )
     dim = X.shape[1]
 
     # Cosine similarity with normalized vectors => use inner product index
@@ -59,16 +195,10 @@ def main():
     # Write aligned metadata (FAISS id == line number)
     with META_PATH.open("w", encoding="utf-8") as f:
         for r in rows:
-            meta = {
-                "chunk_id": r.get("chunk_id"),
-                "doc_id": r.get("doc_id"),
-                "filename": r.get("filename"),
-                "company": r.get("company"),
-                "filing_year": r.get("filing_year"),
-                "filing_type": r.get("filing_type"),
-                "n_chars": r.get("n_chars"),
-            }
-            f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+            f.write(json.dumps(meta_from_row(r), ensure_ascii=False) + "\n")
+
+    if not args.keep_shards:
+        shutil.rmtree(SHARDS_DIR, ignore_errors=True)
 
     print(f"Chunks: {len(rows)}")
     print(f"Embedding dim: {dim}")
@@ -79,4 +209,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,233 @@
+# scripts/profile_serving.py
+"""
+Startup and memory profile of the serving stack.
+
+Loads each serving component on its own (imports, embedding model, then the
+steps of faiss_store.load_store one by one) and reports wall time plus RSS and
+tracemalloc deltas per step as JSON. Each store format runs in a fresh
+subprocess so the numbers are not polluted by an earlier run.
+
+    python -m scripts.profile_serving
+    python -m scripts.profile_serving --formats jsonl columnar
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+Step = Tuple[str, Callable[[Dict[str, Any]], Any]]
+
+DROP = object()  # a step returning this removes its input from `held` instead of storing a value
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # fallback: high-water mark, not current RSS
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def profile_step(name: str, fn: Callable[[Dict[str, Any]], Any], held: Dict[str, Any], trace: bool) -> Dict[str, Any]:
+    gc.collect()
+    rss0 = rss_mb()
+    traced0 = tracemalloc.get_traced_memory()[0] if trace else 0
+    t0 = time.perf_counter()
+    value = fn(held)
+    elapsed = time.perf_counter() - t0
+    if value is not DROP:
+        held[name] = value  # keep loaded objects alive so their memory stays counted
+    gc.collect()
+    rss1 = rss_mb()
+    step: Dict[str, Any] = {
+        "step": name,
+        "seconds": round(elapsed, 4),
+        "rss_mb": round(rss1, 1),
+        "rss_delta_mb": round(rss1 - rss0, 1),
+    }
+    if trace:
+        step["py_alloc_delta_mb"] = round((tracemalloc.get_traced_memory()[0] - traced0) / 1e6, 1)
+    return step
+
+
+def _import(module: str) -> Callable[[Dict[str, Any]], Any]:
+    return lambda held: importlib.import_module(module)
+
+
+def _drop(key: str) -> Callable[[Dict[str, Any]], Any]:
+    def drop(held: Dict[str, Any]) -> Any:
+        del held[key]
+        return DROP
+
+    return drop
+
+
+def _store():
+    from api.rag import faiss_store
+
+    return faiss_store
+
+
+def _load_model(held: Dict[str, Any]) -> Any:
+    from api.rag.embeddings import get_model
+
+    return get_model()
+
+
+COMMON_STEPS: List[Step] = [
+    ("import_numpy", _import("numpy")),
+    ("import_faiss", _import("faiss")),
+    ("import_torch", _import("torch")),
+    ("import_sentence_transformers", _import("sentence_transformers")),
+    ("import_api", _import("api.main")),
+    ("embedding_model", _load_model),
+    ("load_store.check_artifacts", lambda held: _store().check_artifacts()),
+    ("load_store.read_index", lambda held: _store().read_index()),
+]
+
+
+def _partition_all(held: Dict[str, Any]) -> Any:
+    fs = _store()
+    store = held["load_store.publish"]
+    sections = {m.get("section") for m in store.meta if m.get("section")}
+    return [fs._partition(store, s) for s in sorted(sections)]
+
+
+def _first_query(held: Dict[str, Any]) -> Any:
+    return _store().search("What are the key liquidity risks?", top_k=5)
+
+
+# The format served today: the exact steps load_store runs, then the lazy
+# per-query work (section partitions, first search).
+JSONL_STEPS: List[Step] = [
+    ("load_store.read_meta", lambda held: _store().read_meta()),  # _meta: list of dicts
+    ("load_store.read_chunks", lambda held: _store().read_chunks()),
+    ("load_store.text_columns", lambda held: _store().text_columns(held["load_store.read_chunks"])),
+    (
+        "load_store.check_aligned",
+        lambda held: _store().check_aligned(
+            held["load_store.read_index"], held["load_store.read_meta"], held["load_store.text_columns"][0]
+        ),
+    ),
+    (
+        "load_store.publish",
+        lambda held: _store()._publish(
+            held["load_store.read_index"], held["load_store.read_meta"], *held["load_store.text_columns"]
+        ),
+    ),
+    # Chunk row dicts are garbage once publish returns; the negative delta is
+    # what serving frees, the texts themselves stay referenced by the store.
+    ("release_chunk_rows", _drop("load_store.read_chunks")),
+    ("partition_ids", _partition_all),
+    ("first_query", _first_query),
+]
+
+
+def _columnar_meta(held: Dict[str, Any]) -> Dict[str, List[Any]]:
+    # One list per field with interned strings, instead of one dict per chunk.
+    rows = _store().read_meta()
+    cols: Dict[str, List[Any]] = {}
+    for r in rows:
+        for k, v in r.items():
+            cols.setdefault(k, []).append(sys.intern(v) if isinstance(v, str) else v)
+    return cols
+
+
+def _packed_texts(held: Dict[str, Any]) -> Any:
+    # Raw and display text as one string each plus int64 offsets, instead of
+    # one str object per chunk.
+    import numpy as np
+
+    fs = _store()
+    text_by_idx, clean_by_idx, spans = fs.text_columns(held["load_store.read_chunks"])
+
+    def pack(texts: List[str]) -> Tuple[str, Any]:
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(t) for t in texts])
+        return "".join(texts), offsets
+
+    return pack(text_by_idx), pack(clean_by_idx), np.asarray(spans, dtype=np.int32)
+
+
+# Candidate layout for metadata and text storage; same index and artifacts on disk.
+COLUMNAR_STEPS: List[Step] = [
+    ("columnar.meta", _columnar_meta),
+    ("load_store.read_chunks", lambda held: _store().read_chunks()),
+    ("columnar.packed_texts", _packed_texts),
+    ("release_chunk_rows", _drop("load_store.read_chunks")),
+]
+
+# Store formats: how metadata and chunk text are held in memory. Add new formats here to compare them.
+STORE_FORMATS: Dict[str, List[Step]] = {
+    "jsonl": JSONL_STEPS,
+    "columnar": COLUMNAR_STEPS,
+}
+
+
+def run_profile(store_format: str, trace: bool) -> Dict[str, Any]:
+    if trace:
+        tracemalloc.start()
+
+    held: Dict[str, Any] = {}
+    rss_start = rss_mb()
+    steps = [profile_step(name, fn, held, trace) for name, fn in COMMON_STEPS + STORE_FORMATS[store_format]]
+
+    if trace:
+        tracemalloc.stop()
+
+    return {
+        "format": store_format,
+        "tracemalloc": trace,
+        "rss_start_mb": round(rss_start, 1),
+        "rss_end_mb": round(rss_mb(), 1),
+        "steps": steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import/load time and memory of the serving stack")
+    parser.add_argument("--formats", nargs="+", default=["jsonl"], choices=sorted(STORE_FORMATS))
+    parser.add_argument(
+        "--no-tracemalloc",
+        action="store_true",
+        help="Skip tracemalloc (it slows imports, which inflates import times)",
+    )
+    parser.add_argument("--out", type=Path, default=None, help="Optional path to write the JSON report")
+    parser.add_argument("--_single", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._single is not None:
+        print(json.dumps(run_profile(args._single, trace=not args.no_tracemalloc)))
+        return
+
+    results = []
+    for fmt in args.formats:
+        cmd = [sys.executable, "-m", "scripts.profile_serving", "--_single", fmt]
+        if args.no_tracemalloc:
+            cmd.append("--no-tracemalloc")
+        # stderr is inherited so a failing child shows its traceback
+        out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(report, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
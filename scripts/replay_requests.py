@@ -0,0 +1,160 @@
+# scripts/replay_requests.py
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from api.request_log import LOG_PATH
+
+DEFAULT_API_BASE = "http://127.0.0.1:8000"
+
+
+def read_log(path: Path, endpoint: str) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            r = json.loads(line)
+            if r.get("endpoint", "/ask") == endpoint and r.get("question"):
+                rows.append(r)
+    return rows
+
+
+def to_payload(r: Dict[str, Any], endpoint: str) -> Dict[str, Any]:
+    if endpoint == "/compare":
+        return {
+            "question": r["question"],
+            "doc_ids": r.get("doc_ids"),
+            "top_k": r.get("top_k", 3),
+            "section": r.get("section"),
+        }
+    return {"question": r["question"], "doc_id": r.get("doc_id"), "top_k": r.get("top_k", 5), "section": r.get("section")}
+
+
+def percentile(sorted_vals: List[float], p: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, max(0, round(p / 100 * (len(sorted_vals) - 1))))
+    return round(sorted_vals[k], 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay logged requests against the API")
+    parser.add_argument("--log", type=Path, default=LOG_PATH)
+    parser.add_argument("--api-base", default=DEFAULT_API_BASE)
+    parser.add_argument("--endpoint", default="/ask", choices=["/ask", "/compare"])
+    parser.add_argument("--rate", type=float, default=5.0, help="Requests per second (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=None, help="Replay at most N logged requests")
+    parser.add_argument("--loops", type=int, default=1, help="Replay the log this many times")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    if not args.log.exists():
+        raise FileNotFoundError(f"Missing {args.log}. Send some traffic to the API first.")
+
+    rows = read_log(args.log, args.endpoint)
+    if args.limit is not None:
+        rows = rows[: args.limit]
+    if not rows:
+        raise ValueError(f"No {args.endpoint} requests found in {args.log}")
+    payloads = [to_payload(r, args.endpoint) for r in rows] * max(1, args.loops)
+
+    url = args.api_base.rstrip("/") + args.endpoint
+    session_local = threading.local()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    service_times: List[float] = []
+    errors: Dict[str, int] = {}
+    refusals: Dict[str, int] = {}
+
+    def send(payload: Dict[str, Any], scheduled: float) -> None:
+        session = getattr(session_local, "s", None)
+        if session is None:
+            session = session_local.s = requests.Session()
+        t0 = time.perf_counter()
+        refusal = None
+        try:
+            resp = session.post(url, json=payload, timeout=args.timeout)
+            err = None if resp.status_code == 200 else f"http_{resp.status_code}"
+            if err is None:
+                # /ask and /compare answer 200 with refused=true, e.g. when artifacts are
+                # missing or the section is invalid; those are not successes.
+                body = resp.json()
+                if body.get("refused"):
+                    refusal = body.get("refusal_reason") or "refused"
+        except ValueError:  # before RequestException: requests' JSONDecodeError is both
+            err = "invalid_json"
+        except requests.RequestException as e:
+            err = type(e).__name__
+        done = time.perf_counter()
+        with lock:
+            if refusal is not None:
+                refusals[refusal] = refusals.get(refusal, 0) + 1
+            elif err is None:
+                # Latency counts from the scheduled send time, so time spent waiting for
+                # a free client thread (when the rate outruns --concurrency) is included.
+                latencies.append((done - scheduled) * 1000)
+                service_times.append((done - t0) * 1000)
+            else:
+                errors[err] = errors.get(err, 0) + 1
+
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for i, payload in enumerate(payloads):
+            if interval > 0:
+                # Open-loop schedule: request i is due at start + i * interval
+                scheduled = start + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()  # no schedule: time from submission
+            pool.submit(send, payload, scheduled)
+    wall_s = time.perf_counter() - start
+
+    lat = sorted(latencies)
+    svc = sorted(service_times)
+    n_err = sum(errors.values())
+    n_refused = sum(refusals.values())
+    report = {
+        "endpoint": args.endpoint,
+        "sent": len(payloads),
+        "ok": len(lat),
+        "errors": n_err,
+        "error_rate": round(n_err / len(payloads), 4),
+        "error_kinds": errors,
+        "refused": n_refused,
+        "refused_rate": round(n_refused / len(payloads), 4),
+        "refusal_reasons": refusals,
+        "wall_seconds": round(wall_s, 2),
+        "achieved_rps": round(len(payloads) / wall_s, 2) if wall_s > 0 else None,
+        "latency_ms": {
+            "p50": percentile(lat, 50),
+            "p90": percentile(lat, 90),
+            "p95": percentile(lat, 95),
+            "p99": percentile(lat, 99),
+            "max": round(lat[-1], 2) if lat else None,
+        },
+        # Server round-trip only, excluding queueing in the client pool
+        "service_ms": {
+            "p50": percentile(svc, 50),
+            "p95": percentile(svc, 95),
+            "p99": percentile(svc, 99),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()